@@ -1,4 +1,5 @@
 """Python bindings for rank-eval — IR evaluation metrics and TREC format parsing."""
 
-__version__ = "0.1.0"
+from .rank_eval import *  # noqa: F401,F403
 
+__version__ = "0.1.0"
@@ -25,7 +25,7 @@
 use ::rank_eval::binary;
 use ::rank_eval::graded;
 use pyo3::prelude::*;
-use pyo3::types::{PyList, PySet, PyDict, PyTuple};
+use pyo3::types::{PyList, PySet, PyDict, PyString, PyTuple};
 
 /// Python module for rank-eval.
 #[pymodule]
@@ -39,6 +39,11 @@ fn rank_eval_module(_py: Python<'_>, m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(idcg_at_k_py, m)?)?;
     m.add_function(wrap_pyfunction!(ndcg_at_k_py, m)?)?;
     m.add_function(wrap_pyfunction!(average_precision_py, m)?)?;
+    m.add_function(wrap_pyfunction!(err_at_k_py, m)?)?;
+    m.add_function(wrap_pyfunction!(rbp_at_k_py, m)?)?;
+    m.add_function(wrap_pyfunction!(f_measure_at_k_py, m)?)?;
+    m.add_function(wrap_pyfunction!(success_at_k_py, m)?)?;
+    m.add_function(wrap_pyfunction!(r_precision_py, m)?)?;
     
     // Graded relevance metrics
     m.add_function(wrap_pyfunction!(compute_ndcg_py, m)?)?;
@@ -49,6 +54,7 @@ fn rank_eval_module(_py: Python<'_>, m: &Bound<'_, PyModule>) -> PyResult<()> {
 
 /// Precision at rank k.
 #[pyfunction]
+#[pyo3(name = "precision_at_k")]
 fn precision_at_k_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>, k: usize) -> PyResult<f64> {
     let ranked_vec: Vec<String> = ranked
         .iter()
@@ -65,6 +71,7 @@ fn precision_at_k_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>, k:
 
 /// Recall at rank k.
 #[pyfunction]
+#[pyo3(name = "recall_at_k")]
 fn recall_at_k_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>, k: usize) -> PyResult<f64> {
     let ranked_vec: Vec<String> = ranked
         .iter()
@@ -81,6 +88,7 @@ fn recall_at_k_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>, k: us
 
 /// Mean Reciprocal Rank.
 #[pyfunction]
+#[pyo3(name = "mrr")]
 fn mrr_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>) -> PyResult<f64> {
     let ranked_vec: Vec<String> = ranked
         .iter()
@@ -97,6 +105,7 @@ fn mrr_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>) -> PyResult<f
 
 /// Discounted Cumulative Gain at rank k.
 #[pyfunction]
+#[pyo3(name = "dcg_at_k")]
 fn dcg_at_k_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>, k: usize) -> PyResult<f64> {
     let ranked_vec: Vec<String> = ranked
         .iter()
@@ -113,18 +122,22 @@ fn dcg_at_k_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>, k: usize
 
 /// Ideal DCG at rank k.
 #[pyfunction]
+#[pyo3(name = "idcg_at_k")]
+// `ranked` is unused but kept so the signature matches the other binary metrics.
+#[allow(unused_variables)]
 fn idcg_at_k_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>, k: usize) -> PyResult<f64> {
-    let relevant_set: std::collections::HashSet<String> = relevant
-        .iter()
-        .map(|v| v.extract::<String>())
-        .collect::<Result<std::collections::HashSet<_>, _>>()?;
-    
-    let n_relevant = relevant_set.len();
-    Ok(binary::idcg_at_k(n_relevant, k))
+    // IDCG only depends on how many documents are relevant. Type-check the
+    // elements like the sibling bindings do, but count them without copying
+    // each one into a Rust `String`.
+    for v in relevant.iter() {
+        v.downcast::<PyString>()?;
+    }
+    Ok(binary::idcg_at_k(relevant.len(), k))
 }
 
 /// Normalized DCG at rank k.
 #[pyfunction]
+#[pyo3(name = "ndcg_at_k")]
 fn ndcg_at_k_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>, k: usize) -> PyResult<f64> {
     let ranked_vec: Vec<String> = ranked
         .iter()
@@ -141,6 +154,7 @@ fn ndcg_at_k_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>, k: usiz
 
 /// Average Precision (MAP for single query).
 #[pyfunction]
+#[pyo3(name = "average_precision")]
 fn average_precision_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>) -> PyResult<f64> {
     let ranked_vec: Vec<String> = ranked
         .iter()
@@ -157,6 +171,7 @@ fn average_precision_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>)
 
 /// Expected Reciprocal Rank (ERR) at k.
 #[pyfunction]
+#[pyo3(name = "err_at_k")]
 fn err_at_k_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>, k: usize) -> PyResult<f64> {
     let ranked_vec: Vec<String> = ranked
         .iter()
@@ -173,6 +188,7 @@ fn err_at_k_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>, k: usize
 
 /// Rank-Biased Precision (RBP) at k.
 #[pyfunction]
+#[pyo3(name = "rbp_at_k")]
 fn rbp_at_k_py(
     ranked: &Bound<'_, PyList>,
     relevant: &Bound<'_, PySet>,
@@ -194,6 +210,7 @@ fn rbp_at_k_py(
 
 /// F-measure at k (F1, F2, etc.).
 #[pyfunction]
+#[pyo3(name = "f_measure_at_k")]
 fn f_measure_at_k_py(
     ranked: &Bound<'_, PyList>,
     relevant: &Bound<'_, PySet>,
@@ -215,6 +232,7 @@ fn f_measure_at_k_py(
 
 /// Success at k: whether at least one relevant document is in top-k.
 #[pyfunction]
+#[pyo3(name = "success_at_k")]
 fn success_at_k_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>, k: usize) -> PyResult<f64> {
     let ranked_vec: Vec<String> = ranked
         .iter()
@@ -231,6 +249,7 @@ fn success_at_k_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>, k: u
 
 /// R-Precision: Precision at R (where R is the number of relevant documents).
 #[pyfunction]
+#[pyo3(name = "r_precision")]
 fn r_precision_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>) -> PyResult<f64> {
     let ranked_vec: Vec<String> = ranked
         .iter()
@@ -247,6 +266,7 @@ fn r_precision_py(ranked: &Bound<'_, PyList>, relevant: &Bound<'_, PySet>) -> Py
 
 /// Compute nDCG@k for graded relevance.
 #[pyfunction]
+#[pyo3(name = "compute_ndcg")]
 fn compute_ndcg_py(
     ranked: &Bound<'_, PyList>,
     qrels: &Bound<'_, PyDict>,
@@ -262,18 +282,19 @@ fn compute_ndcg_py(
         })
         .collect::<PyResult<Vec<_>>>()?;
     
-    let mut qrels_map = std::collections::HashMap::new();
+    let mut qrels_map = std::collections::HashMap::with_capacity(qrels.len());
     for (key, value) in qrels.iter() {
         let id: String = key.extract()?;
         let relevance: u32 = value.extract()?;
         qrels_map.insert(id, relevance);
     }
     
-    Ok(graded::compute_ndcg(&ranked_vec, &qrels_map, k) as f64)
+    Ok(graded::compute_ndcg(&ranked_vec, &qrels_map, k))
 }
 
 /// Compute MAP for graded relevance.
 #[pyfunction]
+#[pyo3(name = "compute_map")]
 fn compute_map_py(
     ranked: &Bound<'_, PyList>,
     qrels: &Bound<'_, PyDict>,
@@ -288,13 +309,13 @@ fn compute_map_py(
         })
         .collect::<PyResult<Vec<_>>>()?;
     
-    let mut qrels_map = std::collections::HashMap::new();
+    let mut qrels_map = std::collections::HashMap::with_capacity(qrels.len());
     for (key, value) in qrels.iter() {
         let id: String = key.extract()?;
         let relevance: u32 = value.extract()?;
         qrels_map.insert(id, relevance);
     }
     
-    Ok(graded::compute_map(&ranked_vec, &qrels_map) as f64)
+    Ok(graded::compute_map(&ranked_vec, &qrels_map))
 }
 
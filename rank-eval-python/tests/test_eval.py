@@ -130,3 +130,15 @@ def test_r_precision():
     # Top-2: doc1 (relevant), doc2 (not relevant) -> precision = 1/2 = 0.5
     assert abs(r_prec - 0.5) < 0.1
 
+
+def test_idcg_at_k():
+    """Test ideal DCG and its element type check."""
+    ranked = ["doc1", "doc2"]
+    relevant = {"doc1", "doc3"}
+    
+    # Two relevant documents: 1/log2(2) + 1/log2(3)
+    idcg = rank_eval.idcg_at_k(ranked, relevant, k=10)
+    assert abs(idcg - (1.0 + 1.0 / 1.584962500721156)) < 1e-9
+    
+    with pytest.raises(TypeError):
+        rank_eval.idcg_at_k([], {1, 2}, k=5)
@@ -2,6 +2,7 @@
 
 use crate::binary::*;
 use crate::trec::{Qrel, TrecRun};
+use std::cell::OnceCell;
 use std::collections::{HashMap, HashSet};
 
 /// Results for a single query evaluation.
@@ -59,39 +60,11 @@ pub fn evaluate_batch_binary<I: Eq + std::hash::Hash + Clone>(
         "rankings and qrels must have same length"
     );
 
-    let mut query_results = Vec::new();
-    let mut metric_sums: HashMap<String, f64> = HashMap::new();
-    let mut metric_counts: HashMap<String, usize> = HashMap::new();
+    let mut query_results = Vec::with_capacity(rankings.len());
+    let mut totals = MetricTotals::new(metrics);
 
     for (_i, (ranked, relevant)) in rankings.iter().zip(qrels.iter()).enumerate() {
-        let mut query_metrics = HashMap::new();
-
-        for metric_name in metrics {
-            let value = match *metric_name {
-                "ndcg@10" => ndcg_at_k(ranked, relevant, 10),
-                "ndcg@5" => ndcg_at_k(ranked, relevant, 5),
-                "precision@10" => precision_at_k(ranked, relevant, 10),
-                "precision@5" => precision_at_k(ranked, relevant, 5),
-                "precision@1" => precision_at_k(ranked, relevant, 1),
-                "recall@10" => recall_at_k(ranked, relevant, 10),
-                "recall@5" => recall_at_k(ranked, relevant, 5),
-                "mrr" => mrr(ranked, relevant),
-                "ap" | "map" => average_precision(ranked, relevant),
-                "err@10" => err_at_k(ranked, relevant, 10),
-                "rbp@10" => rbp_at_k(ranked, relevant, 10, 0.95),
-                "f1@10" => f_measure_at_k(ranked, relevant, 10, 1.0),
-                "success@10" => success_at_k(ranked, relevant, 10),
-                "r_precision" => r_precision(ranked, relevant),
-                _ => {
-                    eprintln!("Unknown metric: {}", metric_name);
-                    continue;
-                }
-            };
-
-            query_metrics.insert(metric_name.to_string(), value);
-            *metric_sums.entry(metric_name.to_string()).or_insert(0.0) += value;
-            *metric_counts.entry(metric_name.to_string()).or_insert(0) += 1;
-        }
+        let query_metrics = totals.add_query(ranked, relevant);
 
         query_results.push(QueryResults {
             query_id: format!("query_{}", _i),
@@ -99,18 +72,9 @@ pub fn evaluate_batch_binary<I: Eq + std::hash::Hash + Clone>(
         });
     }
 
-    // Compute aggregated means
-    let aggregated: HashMap<String, f64> = metric_sums
-        .into_iter()
-        .map(|(name, sum)| {
-            let count = metric_counts.get(&name).copied().unwrap_or(1);
-            (name, sum / count as f64)
-        })
-        .collect();
-
     BatchResults {
         query_results,
-        aggregated,
+        aggregated: totals.means(),
     }
 }
 
@@ -137,9 +101,8 @@ pub fn evaluate_trec_batch(
     let runs_by_query = group_runs_by_query(runs);
     let qrels_by_query = group_qrels_by_query(qrels);
 
-    let mut query_results = Vec::new();
-    let mut metric_sums: HashMap<String, f64> = HashMap::new();
-    let mut metric_counts: HashMap<String, usize> = HashMap::new();
+    let mut query_results = Vec::with_capacity(qrels_by_query.len());
+    let mut totals = MetricTotals::new(metrics);
 
     for (query_id, query_qrels) in &qrels_by_query {
         // Get first run for this query (or skip if no runs)
@@ -157,10 +120,9 @@ pub fn evaluate_trec_batch(
         let run_tag = first_run_tag.unwrap();
         let ranked_run = &query_runs[run_tag];
 
-        // Convert to ranked list
-        let mut ranked: Vec<(&String, f32)> = ranked_run.iter().map(|(id, score)| (id, *score)).collect();
-        ranked.sort_by(|a, b| b.1.partial_cmp(&a.1).unwrap());
-        let ranked_ids: Vec<&String> = ranked.iter().map(|(id, _)| *id).collect();
+        // group_runs_by_query already sorts each run by score (descending),
+        // so the ids can be taken in order without re-sorting.
+        let ranked_ids: Vec<&String> = ranked_run.iter().map(|(id, _)| id).collect();
 
         // Convert qrels to HashSet
         let relevant: HashSet<_> = query_qrels
@@ -169,34 +131,7 @@ pub fn evaluate_trec_batch(
             .map(|(id, _)| id)
             .collect();
 
-        let mut query_metrics = HashMap::new();
-
-        for metric_name in metrics {
-            let value = match *metric_name {
-                "ndcg@10" => ndcg_at_k(&ranked_ids, &relevant, 10),
-                "ndcg@5" => ndcg_at_k(&ranked_ids, &relevant, 5),
-                "precision@10" => precision_at_k(&ranked_ids, &relevant, 10),
-                "precision@5" => precision_at_k(&ranked_ids, &relevant, 5),
-                "precision@1" => precision_at_k(&ranked_ids, &relevant, 1),
-                "recall@10" => recall_at_k(&ranked_ids, &relevant, 10),
-                "recall@5" => recall_at_k(&ranked_ids, &relevant, 5),
-                "mrr" => mrr(&ranked_ids, &relevant),
-                "ap" | "map" => average_precision(&ranked_ids, &relevant),
-                "err@10" => err_at_k(&ranked_ids, &relevant, 10),
-                "rbp@10" => rbp_at_k(&ranked_ids, &relevant, 10, 0.95),
-                "f1@10" => f_measure_at_k(&ranked_ids, &relevant, 10, 1.0),
-                "success@10" => success_at_k(&ranked_ids, &relevant, 10),
-                "r_precision" => r_precision(&ranked_ids, &relevant),
-                _ => {
-                    eprintln!("Unknown metric: {}", metric_name);
-                    continue;
-                }
-            };
-
-            query_metrics.insert(metric_name.to_string(), value);
-            *metric_sums.entry(metric_name.to_string()).or_insert(0.0) += value;
-            *metric_counts.entry(metric_name.to_string()).or_insert(0) += 1;
-        }
+        let query_metrics = totals.add_query(&ranked_ids, &relevant);
 
         query_results.push(QueryResults {
             query_id: query_id.clone(),
@@ -204,18 +139,155 @@ pub fn evaluate_trec_batch(
         });
     }
 
-    // Compute aggregated means
-    let aggregated: HashMap<String, f64> = metric_sums
-        .into_iter()
-        .map(|(name, sum)| {
-            let count = metric_counts.get(&name).copied().unwrap_or(1);
-            (name, sum / count as f64)
-        })
-        .collect();
-
     BatchResults {
         query_results,
-        aggregated,
+        aggregated: totals.means(),
+    }
+}
+
+/// A metric name understood by the batch evaluators.
+#[derive(Debug, Clone, Copy)]
+enum Metric {
+    Ndcg10,
+    Ndcg5,
+    Precision10,
+    Precision5,
+    Precision1,
+    Recall10,
+    Recall5,
+    Mrr,
+    AveragePrecision,
+    Err10,
+    Rbp10,
+    F1At10,
+    Success10,
+    RPrecision,
+}
+
+impl Metric {
+    fn parse(name: &str) -> Option<Self> {
+        Some(match name {
+            "ndcg@10" => Metric::Ndcg10,
+            "ndcg@5" => Metric::Ndcg5,
+            "precision@10" => Metric::Precision10,
+            "precision@5" => Metric::Precision5,
+            "precision@1" => Metric::Precision1,
+            "recall@10" => Metric::Recall10,
+            "recall@5" => Metric::Recall5,
+            "mrr" => Metric::Mrr,
+            "ap" | "map" => Metric::AveragePrecision,
+            "err@10" => Metric::Err10,
+            "rbp@10" => Metric::Rbp10,
+            "f1@10" => Metric::F1At10,
+            "success@10" => Metric::Success10,
+            "r_precision" => Metric::RPrecision,
+            _ => return None,
+        })
+    }
+}
+
+/// Compute the requested metrics for a single query.
+///
+/// The ranking is resolved against the qrels once into a `RelevanceMask`, and
+/// every metric is evaluated from that mask rather than re-probing the
+/// relevant set per metric. nDCG@5 and nDCG@10 come from a single prefix pass,
+/// run only if one of them was requested.
+///
+/// `values[i]` receives the value of `metrics[i]`, or `None` for a metric
+/// name that did not parse.
+fn evaluate_query<I: Eq + std::hash::Hash>(
+    ranked: &[I],
+    relevant: &HashSet<I>,
+    metrics: &[Option<Metric>],
+    values: &mut [Option<f64>],
+) {
+    let mask = RelevanceMask::new(ranked, relevant);
+    let ndcg = OnceCell::new();
+    let ndcg = || *ndcg.get_or_init(|| mask.ndcg_at_cutoffs([5, 10]));
+
+    for (metric, slot) in metrics.iter().zip(values.iter_mut()) {
+        *slot = metric.map(|metric| match metric {
+            Metric::Ndcg10 => ndcg()[1],
+            Metric::Ndcg5 => ndcg()[0],
+            Metric::Precision10 => mask.precision_at_k(10),
+            Metric::Precision5 => mask.precision_at_k(5),
+            Metric::Precision1 => mask.precision_at_k(1),
+            Metric::Recall10 => mask.recall_at_k(10),
+            Metric::Recall5 => mask.recall_at_k(5),
+            Metric::Mrr => mask.mrr(),
+            Metric::AveragePrecision => mask.average_precision(),
+            Metric::Err10 => mask.err_at_k(10),
+            Metric::Rbp10 => mask.rbp_at_k(10, 0.95),
+            Metric::F1At10 => mask.f_measure_at_k(10, 1.0),
+            Metric::Success10 => mask.success_at_k(10),
+            Metric::RPrecision => mask.r_precision(),
+        });
+    }
+}
+
+/// Running per-metric totals across a batch.
+///
+/// Metric names are parsed once up front (unknown names are reported once,
+/// not once per query). Sums and counts live in vectors indexed by position
+/// in the requested metric list, allocated once per batch, so adding a query
+/// does not clone metric names into hash map keys.
+struct MetricTotals<'a> {
+    names: &'a [&'a str],
+    metrics: Vec<Option<Metric>>,
+    values: Vec<Option<f64>>,
+    sums: Vec<f64>,
+    counts: Vec<usize>,
+}
+
+impl<'a> MetricTotals<'a> {
+    fn new(names: &'a [&'a str]) -> Self {
+        let metrics = names
+            .iter()
+            .map(|name| {
+                let metric = Metric::parse(name);
+                if metric.is_none() {
+                    eprintln!("Unknown metric: {}", name);
+                }
+                metric
+            })
+            .collect();
+
+        Self {
+            names,
+            metrics,
+            values: vec![None; names.len()],
+            sums: vec![0.0; names.len()],
+            counts: vec![0; names.len()],
+        }
+    }
+
+    /// Evaluate one query, add it to the totals, and return its metric map.
+    fn add_query<I: Eq + std::hash::Hash>(
+        &mut self,
+        ranked: &[I],
+        relevant: &HashSet<I>,
+    ) -> HashMap<String, f64> {
+        evaluate_query(ranked, relevant, &self.metrics, &mut self.values);
+
+        let mut query_metrics = HashMap::with_capacity(self.names.len());
+        for (i, value) in self.values.iter().enumerate() {
+            if let Some(value) = *value {
+                self.sums[i] += value;
+                self.counts[i] += 1;
+                query_metrics.insert(self.names[i].to_string(), value);
+            }
+        }
+        query_metrics
+    }
+
+    /// Mean of each metric over the queries it was computed for.
+    fn means(&self) -> HashMap<String, f64> {
+        self.names
+            .iter()
+            .zip(self.sums.iter().zip(&self.counts))
+            .filter(|(_, (_, &count))| count > 0)
+            .map(|(name, (&sum, &count))| (name.to_string(), sum / count as f64))
+            .collect()
     }
 }
 
@@ -241,5 +313,64 @@ mod tests {
         assert!(results.aggregated.contains_key("ndcg@10"));
         assert!(results.aggregated.contains_key("precision@5"));
     }
-}
 
+    #[test]
+    fn test_batch_ndcg_matches_single_query() {
+        let rankings = vec![
+            vec!["a", "b", "c", "d", "e", "f", "g"],
+            vec!["x", "y", "z"],
+        ];
+        let qrels = vec![
+            ["b", "d", "f", "h", "i", "j", "k"].into_iter().collect::<HashSet<_>>(),
+            HashSet::new(),
+        ];
+
+        let results = evaluate_batch_binary(&rankings, &qrels, &["ndcg@5", "ndcg@10"]);
+
+        for (query, (ranked, relevant)) in results.query_results.iter().zip(rankings.iter().zip(&qrels)) {
+            assert_eq!(query.metrics["ndcg@5"], ndcg_at_k(ranked, relevant, 5));
+            assert_eq!(query.metrics["ndcg@10"], ndcg_at_k(ranked, relevant, 10));
+        }
+    }
+
+    #[test]
+    fn test_evaluate_trec_batch_ranks_by_score() {
+        let run = |doc: &str, rank: usize, score: f32| TrecRun {
+            query_id: "q1".to_string(),
+            doc_id: doc.to_string(),
+            rank,
+            score,
+            run_tag: "run1".to_string(),
+        };
+        // Listed out of score order; doc2 has the highest score.
+        let runs = vec![run("doc1", 1, 0.5), run("doc2", 2, 0.9), run("doc3", 3, 0.1)];
+        let qrels = vec![Qrel {
+            query_id: "q1".to_string(),
+            doc_id: "doc2".to_string(),
+            relevance: 1,
+        }];
+
+        let results = evaluate_trec_batch(&runs, &qrels, &["mrr", "precision@1"]);
+
+        assert_eq!(results.query_results.len(), 1);
+        assert_eq!(results.aggregated["mrr"], 1.0);
+        assert_eq!(results.aggregated["precision@1"], 1.0);
+    }
+
+    #[test]
+    fn test_unknown_metric_is_skipped() {
+        let rankings = vec![vec!["doc1", "doc2"], vec!["doc3"]];
+        let qrels = vec![
+            ["doc1"].into_iter().collect::<HashSet<_>>(),
+            ["doc3"].into_iter().collect::<HashSet<_>>(),
+        ];
+
+        let results = evaluate_batch_binary(&rankings, &qrels, &["mrr", "bogus@3"]);
+
+        assert_eq!(results.aggregated.len(), 1);
+        assert_eq!(results.aggregated["mrr"], 1.0);
+        for query in &results.query_results {
+            assert!(!query.metrics.contains_key("bogus@3"));
+        }
+    }
+}
@@ -7,6 +7,188 @@
 //! These metrics use binary relevance: a document is either relevant (in the set) or not.
 
 use std::collections::HashSet;
+use std::sync::OnceLock;
+
+/// Number of leading ranks whose DCG discount is precomputed.
+const DISCOUNT_TABLE_LEN: usize = 1024;
+
+/// Lazily built table of `1 / log₂(i + 2)` for the first ranks.
+fn discount_table() -> &'static [f64; DISCOUNT_TABLE_LEN] {
+    static TABLE: OnceLock<[f64; DISCOUNT_TABLE_LEN]> = OnceLock::new();
+    TABLE.get_or_init(|| std::array::from_fn(|i| 1.0 / (i as f64 + 2.0).log2()))
+}
+
+/// Positional discount `1 / log₂(i + 2)` for 0-indexed rank `i`.
+///
+/// Shared by every DCG-style computation so the discount is defined once.
+/// Ranks below `DISCOUNT_TABLE_LEN` are served from a cached table; deeper
+/// ranks fall back to computing the logarithm.
+#[inline]
+pub(crate) fn discount(i: usize) -> f64 {
+    match discount_table().get(i) {
+        Some(&d) => d,
+        None => 1.0 / (i as f64 + 2.0).log2(),
+    }
+}
+
+/// Metric cores over a ranking's hit flags (`true` where the document at that
+/// rank is relevant).
+///
+/// Each formula lives here once. The public functions feed it
+/// `ranked.iter().map(|id| relevant.contains(id))`, and `RelevanceMask` feeds
+/// it the flags it has already resolved.
+mod hits {
+    use super::discount;
+
+    pub(super) fn precision_at_k(hits: impl Iterator<Item = bool>, k: usize) -> f64 {
+        if k == 0 {
+            return 0.0;
+        }
+        count_at_k(hits, k) as f64 / k as f64
+    }
+
+    pub(super) fn recall_at_k(hits: impl Iterator<Item = bool>, n_relevant: usize, k: usize) -> f64 {
+        if n_relevant == 0 {
+            return 0.0;
+        }
+        count_at_k(hits, k) as f64 / n_relevant as f64
+    }
+
+    pub(super) fn mrr(mut hits: impl Iterator<Item = bool>) -> f64 {
+        hits.position(|hit| hit).map_or(0.0, |i| 1.0 / (i + 1) as f64)
+    }
+
+    /// DCG at each of the ascending `cutoffs`, accumulated in a single pass so
+    /// every shallower cutoff is a prefix of the deeper ones.
+    pub(super) fn dcg_at_cutoffs<const N: usize>(
+        hits: impl Iterator<Item = bool>,
+        cutoffs: [usize; N],
+    ) -> [f64; N] {
+        let mut out = [0.0; N];
+        let mut dcg = 0.0;
+        let mut next = 0;
+
+        for (i, hit) in hits.enumerate() {
+            while next < N && i >= cutoffs[next] {
+                out[next] = dcg;
+                next += 1;
+            }
+            if next == N {
+                return out;
+            }
+            if hit {
+                dcg += discount(i);
+            }
+        }
+
+        for slot in &mut out[next..] {
+            *slot = dcg;
+        }
+        out
+    }
+
+    pub(super) fn average_precision(hits: impl Iterator<Item = bool>, n_relevant: usize) -> f64 {
+        if n_relevant == 0 {
+            return 0.0;
+        }
+
+        let mut sum = 0.0;
+        let mut n_hits = 0;
+
+        for (i, hit) in hits.enumerate() {
+            if hit {
+                n_hits += 1;
+                sum += n_hits as f64 / (i + 1) as f64;
+            }
+        }
+
+        sum / n_relevant as f64
+    }
+
+    pub(super) fn err_at_k(hits: impl Iterator<Item = bool>, k: usize) -> f64 {
+        let mut p_stop = 1.0; // Probability of continuing to this position
+        let mut err = 0.0;
+
+        for (i, hit) in hits.take(k).enumerate() {
+            let rank = i + 1;
+            if hit {
+                // User finds relevant doc at this position
+                // R(i) = 1 for binary relevance
+                let r = 1.0;
+                // Probability of stopping here = p_stop * r
+                err += p_stop * r / rank as f64;
+                // Update probability of continuing
+                p_stop *= 1.0 - r;
+            }
+            // If not relevant, p_stop remains the same (user continues)
+        }
+
+        err
+    }
+
+    pub(super) fn rbp_at_k(hits: impl Iterator<Item = bool>, k: usize, persistence: f64) -> f64 {
+        if persistence <= 0.0 || persistence >= 1.0 {
+            return 0.0;
+        }
+
+        let mut rbp = 0.0;
+        let mut p_power = 1.0; // p^0 = 1
+
+        for hit in hits.take(k) {
+            if hit {
+                rbp += p_power;
+            }
+            // Update p_power for next rank: p^(i) = p^(i-1) * p
+            p_power *= persistence;
+        }
+
+        (1.0 - persistence) * rbp
+    }
+
+    pub(super) fn f_measure_at_k(
+        hits: impl Iterator<Item = bool> + Clone,
+        n_relevant: usize,
+        k: usize,
+        beta: f64,
+    ) -> f64 {
+        let precision = precision_at_k(hits.clone(), k);
+        let recall = recall_at_k(hits, n_relevant, k);
+
+        if precision == 0.0 && recall == 0.0 {
+            return 0.0;
+        }
+
+        let beta_sq = beta * beta;
+        (1.0 + beta_sq) * (precision * recall) / (beta_sq * precision + recall)
+    }
+
+    pub(super) fn success_at_k(hits: impl Iterator<Item = bool>, k: usize) -> f64 {
+        if hits.take(k).any(|hit| hit) {
+            1.0
+        } else {
+            0.0
+        }
+    }
+
+    pub(super) fn r_precision(hits: impl Iterator<Item = bool>, n_relevant: usize) -> f64 {
+        if n_relevant == 0 {
+            return 0.0;
+        }
+        precision_at_k(hits, n_relevant)
+    }
+
+    fn count_at_k(hits: impl Iterator<Item = bool>, k: usize) -> usize {
+        hits.take(k).filter(|&hit| hit).count()
+    }
+}
+
+/// Hit flags of `ranked` against `relevant`, probed lazily.
+fn hits_of<'a, I: Eq + std::hash::Hash>(
+    ranked: &'a [I],
+    relevant: &'a HashSet<I>,
+) -> impl Iterator<Item = bool> + Clone + 'a {
+    ranked.iter().map(move |id| relevant.contains(id))
+}
 
 /// Precision at k: fraction of top-k that are relevant.
 ///
@@ -29,15 +211,7 @@ pub fn precision_at_k<I: Eq + std::hash::Hash>(
     relevant: &HashSet<I>,
     k: usize,
 ) -> f64 {
-    if k == 0 {
-        return 0.0;
-    }
-    let hits = ranked
-        .iter()
-        .take(k)
-        .filter(|id| relevant.contains(id))
-        .count();
-    hits as f64 / k as f64
+    hits::precision_at_k(hits_of(ranked, relevant), k)
 }
 
 /// Recall at k: fraction of relevant docs in top-k.
@@ -57,15 +231,7 @@ pub fn precision_at_k<I: Eq + std::hash::Hash>(
 /// assert!((r_at_3 - 2.0/3.0).abs() < 1e-9); // 2 out of 3 relevant found
 /// ```
 pub fn recall_at_k<I: Eq + std::hash::Hash>(ranked: &[I], relevant: &HashSet<I>, k: usize) -> f64 {
-    if relevant.is_empty() {
-        return 0.0;
-    }
-    let hits = ranked
-        .iter()
-        .take(k)
-        .filter(|id| relevant.contains(id))
-        .count();
-    hits as f64 / relevant.len() as f64
+    hits::recall_at_k(hits_of(ranked, relevant), relevant.len(), k)
 }
 
 /// Mean Reciprocal Rank: 1 / rank of first relevant document.
@@ -92,12 +258,7 @@ pub fn recall_at_k<I: Eq + std::hash::Hash>(ranked: &[I], relevant: &HashSet<I>,
 /// assert!((mrr_score - 0.5).abs() < 1e-9); // First relevant at rank 2, so 1/2 = 0.5
 /// ```
 pub fn mrr<I: Eq + std::hash::Hash>(ranked: &[I], relevant: &HashSet<I>) -> f64 {
-    for (i, id) in ranked.iter().enumerate() {
-        if relevant.contains(id) {
-            return 1.0 / (i + 1) as f64;
-        }
-    }
-    0.0
+    hits::mrr(hits_of(ranked, relevant))
 }
 
 /// Discounted Cumulative Gain at k.
@@ -131,13 +292,8 @@ pub fn mrr<I: Eq + std::hash::Hash>(ranked: &[I], relevant: &HashSet<I>) -> f64
 /// // Total: 1.5
 /// ```
 pub fn dcg_at_k<I: Eq + std::hash::Hash>(ranked: &[I], relevant: &HashSet<I>, k: usize) -> f64 {
-    ranked
-        .iter()
-        .take(k)
-        .enumerate()
-        .filter(|(_, id)| relevant.contains(id))
-        .map(|(i, _)| 1.0 / (i as f64 + 2.0).log2())
-        .sum()
+    let [dcg] = hits::dcg_at_cutoffs(hits_of(ranked, relevant), [k]);
+    dcg
 }
 
 /// Ideal DCG at k (all relevant docs at top).
@@ -155,9 +311,8 @@ pub fn dcg_at_k<I: Eq + std::hash::Hash>(ranked: &[I], relevant: &HashSet<I>, k:
 /// // This gives the DCG if all 3 relevant docs were at positions 0, 1, 2
 /// ```
 pub fn idcg_at_k(n_relevant: usize, k: usize) -> f64 {
-    (0..k.min(n_relevant))
-        .map(|i| 1.0 / (i as f64 + 2.0).log2())
-        .sum()
+    let [idcg] = hits::dcg_at_cutoffs(std::iter::repeat(true).take(n_relevant), [k]);
+    idcg
 }
 
 /// Normalized DCG at k.
@@ -185,11 +340,16 @@ pub fn idcg_at_k(n_relevant: usize, k: usize) -> f64 {
 /// assert!(ndcg >= 0.0 && ndcg <= 1.0);
 /// ```
 pub fn ndcg_at_k<I: Eq + std::hash::Hash>(ranked: &[I], relevant: &HashSet<I>, k: usize) -> f64 {
-    let ideal = idcg_at_k(relevant.len(), k);
+    normalize_dcg(dcg_at_k(ranked, relevant, k), idcg_at_k(relevant.len(), k))
+}
+
+/// `dcg / ideal`, or 0.0 when there is nothing relevant to normalize against.
+#[inline]
+fn normalize_dcg(dcg: f64, ideal: f64) -> f64 {
     if ideal == 0.0 {
         return 0.0;
     }
-    dcg_at_k(ranked, relevant, k) / ideal
+    dcg / ideal
 }
 
 /// Average Precision: average of precision at each relevant doc.
@@ -219,21 +379,7 @@ pub fn ndcg_at_k<I: Eq + std::hash::Hash>(ranked: &[I], relevant: &HashSet<I>, k
 /// assert!(ap >= 0.0 && ap <= 1.0);
 /// ```
 pub fn average_precision<I: Eq + std::hash::Hash>(ranked: &[I], relevant: &HashSet<I>) -> f64 {
-    if relevant.is_empty() {
-        return 0.0;
-    }
-
-    let mut sum = 0.0;
-    let mut hits = 0;
-
-    for (i, id) in ranked.iter().enumerate() {
-        if relevant.contains(id) {
-            hits += 1;
-            sum += hits as f64 / (i + 1) as f64;
-        }
-    }
-
-    sum / relevant.len() as f64
+    hits::average_precision(hits_of(ranked, relevant), relevant.len())
 }
 
 /// Expected Reciprocal Rank (ERR).
@@ -271,28 +417,7 @@ pub fn err_at_k<I: Eq + std::hash::Hash>(
     relevant: &HashSet<I>,
     k: usize,
 ) -> f64 {
-    if relevant.is_empty() {
-        return 0.0;
-    }
-
-    let mut p_stop = 1.0; // Probability of continuing to this position
-    let mut err = 0.0;
-
-    for (i, id) in ranked.iter().take(k).enumerate() {
-        let rank = i + 1;
-        if relevant.contains(id) {
-            // User finds relevant doc at this position
-            // R(i) = 1 for binary relevance
-            let r = 1.0;
-            // Probability of stopping here = p_stop * r
-            err += p_stop * r / rank as f64;
-            // Update probability of continuing
-            p_stop *= 1.0 - r;
-        }
-        // If not relevant, p_stop remains the same (user continues)
-    }
-
-    err
+    hits::err_at_k(hits_of(ranked, relevant), k)
 }
 
 /// Rank-Biased Precision (RBP).
@@ -331,22 +456,7 @@ pub fn rbp_at_k<I: Eq + std::hash::Hash>(
     k: usize,
     persistence: f64,
 ) -> f64 {
-    if persistence <= 0.0 || persistence >= 1.0 {
-        return 0.0;
-    }
-
-    let mut rbp = 0.0;
-    let mut p_power = 1.0; // p^0 = 1
-
-    for id in ranked.iter().take(k) {
-        if relevant.contains(id) {
-            rbp += p_power;
-        }
-        // Update p_power for next rank: p^(i) = p^(i-1) * p
-        p_power *= persistence;
-    }
-
-    (1.0 - persistence) * rbp
+    hits::rbp_at_k(hits_of(ranked, relevant), k, persistence)
 }
 
 /// F-measure at k: harmonic mean of precision and recall.
@@ -380,15 +490,7 @@ pub fn f_measure_at_k<I: Eq + std::hash::Hash>(
     k: usize,
     beta: f64,
 ) -> f64 {
-    let precision = precision_at_k(ranked, relevant, k);
-    let recall = recall_at_k(ranked, relevant, k);
-
-    if precision == 0.0 && recall == 0.0 {
-        return 0.0;
-    }
-
-    let beta_sq = beta * beta;
-    (1.0 + beta_sq) * (precision * recall) / (beta_sq * precision + recall)
+    hits::f_measure_at_k(hits_of(ranked, relevant), relevant.len(), k, beta)
 }
 
 /// Success at k: whether at least one relevant document is in top-k.
@@ -412,11 +514,7 @@ pub fn success_at_k<I: Eq + std::hash::Hash>(
     relevant: &HashSet<I>,
     k: usize,
 ) -> f64 {
-    if ranked.iter().take(k).any(|id| relevant.contains(id)) {
-        1.0
-    } else {
-        0.0
-    }
+    hits::success_at_k(hits_of(ranked, relevant), k)
 }
 
 /// R-Precision: Precision at R, where R is the number of relevant documents.
@@ -440,11 +538,75 @@ pub fn success_at_k<I: Eq + std::hash::Hash>(
 /// assert!(r_prec >= 0.0 && r_prec <= 1.0);
 /// ```
 pub fn r_precision<I: Eq + std::hash::Hash>(ranked: &[I], relevant: &HashSet<I>) -> f64 {
-    if relevant.is_empty() {
-        return 0.0;
+    hits::r_precision(hits_of(ranked, relevant), relevant.len())
+}
+
+/// Relevance of each ranked position, resolved once against the qrels.
+///
+/// Every public metric probes `relevant` for each position it looks at, so
+/// computing several metrics for the same ranking repeats the same hash
+/// lookups. `RelevanceMask` does the lookups once and runs the shared metric
+/// cores over the resulting `hits` flags.
+pub(crate) struct RelevanceMask {
+    hits: Vec<bool>,
+    n_relevant: usize,
+}
+
+impl RelevanceMask {
+    pub(crate) fn new<I: Eq + std::hash::Hash>(ranked: &[I], relevant: &HashSet<I>) -> Self {
+        Self {
+            hits: hits_of(ranked, relevant).collect(),
+            n_relevant: relevant.len(),
+        }
+    }
+
+    fn hits(&self) -> impl Iterator<Item = bool> + Clone + '_ {
+        self.hits.iter().copied()
+    }
+
+    pub(crate) fn precision_at_k(&self, k: usize) -> f64 {
+        hits::precision_at_k(self.hits(), k)
+    }
+
+    pub(crate) fn recall_at_k(&self, k: usize) -> f64 {
+        hits::recall_at_k(self.hits(), self.n_relevant, k)
+    }
+
+    pub(crate) fn mrr(&self) -> f64 {
+        hits::mrr(self.hits())
+    }
+
+    /// nDCG at each of the ascending `cutoffs`, from one prefix pass over the
+    /// hits and one over the ideal ranking.
+    pub(crate) fn ndcg_at_cutoffs<const N: usize>(&self, cutoffs: [usize; N]) -> [f64; N] {
+        let dcg = hits::dcg_at_cutoffs(self.hits(), cutoffs);
+        let ideal = hits::dcg_at_cutoffs(std::iter::repeat(true).take(self.n_relevant), cutoffs);
+        std::array::from_fn(|i| normalize_dcg(dcg[i], ideal[i]))
+    }
+
+    pub(crate) fn average_precision(&self) -> f64 {
+        hits::average_precision(self.hits(), self.n_relevant)
+    }
+
+    pub(crate) fn err_at_k(&self, k: usize) -> f64 {
+        hits::err_at_k(self.hits(), k)
+    }
+
+    pub(crate) fn rbp_at_k(&self, k: usize, persistence: f64) -> f64 {
+        hits::rbp_at_k(self.hits(), k, persistence)
+    }
+
+    pub(crate) fn f_measure_at_k(&self, k: usize, beta: f64) -> f64 {
+        hits::f_measure_at_k(self.hits(), self.n_relevant, k, beta)
+    }
+
+    pub(crate) fn success_at_k(&self, k: usize) -> f64 {
+        hits::success_at_k(self.hits(), k)
+    }
+
+    pub(crate) fn r_precision(&self) -> f64 {
+        hits::r_precision(self.hits(), self.n_relevant)
     }
-    let r = relevant.len();
-    precision_at_k(ranked, relevant, r)
 }
 
 /// All metrics for a single ranking (binary relevance).
@@ -470,22 +632,27 @@ pub struct Metrics {
 #[cfg(feature = "serde")]
 impl Metrics {
     /// Compute all metrics for a ranking.
+    ///
+    /// The ranking is checked against `relevant` once and every metric is
+    /// derived from the resulting relevance mask.
     pub fn compute<I: Eq + std::hash::Hash>(ranked: &[I], relevant: &HashSet<I>) -> Self {
+        let mask = RelevanceMask::new(ranked, relevant);
+        let [ndcg_at_5, ndcg_at_10] = mask.ndcg_at_cutoffs([5, 10]);
         Self {
-            precision_at_1: precision_at_k(ranked, relevant, 1),
-            precision_at_5: precision_at_k(ranked, relevant, 5),
-            precision_at_10: precision_at_k(ranked, relevant, 10),
-            recall_at_5: recall_at_k(ranked, relevant, 5),
-            recall_at_10: recall_at_k(ranked, relevant, 10),
-            mrr: mrr(ranked, relevant),
-            ndcg_at_5: ndcg_at_k(ranked, relevant, 5),
-            ndcg_at_10: ndcg_at_k(ranked, relevant, 10),
-            average_precision: average_precision(ranked, relevant),
-            err_at_10: err_at_k(ranked, relevant, 10),
-            rbp_at_10: rbp_at_k(ranked, relevant, 10, 0.95),
-            f1_at_10: f_measure_at_k(ranked, relevant, 10, 1.0),
-            success_at_10: success_at_k(ranked, relevant, 10),
-            r_precision: r_precision(ranked, relevant),
+            precision_at_1: mask.precision_at_k(1),
+            precision_at_5: mask.precision_at_k(5),
+            precision_at_10: mask.precision_at_k(10),
+            recall_at_5: mask.recall_at_k(5),
+            recall_at_10: mask.recall_at_k(10),
+            mrr: mask.mrr(),
+            ndcg_at_5,
+            ndcg_at_10,
+            average_precision: mask.average_precision(),
+            err_at_10: mask.err_at_k(10),
+            rbp_at_10: mask.rbp_at_k(10, 0.95),
+            f1_at_10: mask.f_measure_at_k(10, 1.0),
+            success_at_10: mask.success_at_k(10),
+            r_precision: mask.r_precision(),
         }
     }
 }
@@ -653,5 +820,55 @@ mod tests {
         let r_prec2 = r_precision(&ranked2, &relevant);
         assert!((r_prec2 - 1.0).abs() < 1e-9);
     }
-}
 
+    #[test]
+    fn test_relevance_mask_matches_free_functions() {
+        let ranked = vec!["a", "b", "c", "d", "e", "b", "f"];
+        let relevant: HashSet<_> = ["b", "d", "x", "y"].into_iter().collect();
+        let mask = RelevanceMask::new(&ranked, &relevant);
+
+        for k in [0, 1, 2, 3, 5, 10] {
+            assert_eq!(mask.precision_at_k(k), precision_at_k(&ranked, &relevant, k));
+            assert_eq!(mask.recall_at_k(k), recall_at_k(&ranked, &relevant, k));
+            let [shallow, deep] = mask.ndcg_at_cutoffs([k / 2, k]);
+            assert_eq!(shallow, ndcg_at_k(&ranked, &relevant, k / 2));
+            assert_eq!(deep, ndcg_at_k(&ranked, &relevant, k));
+            assert_eq!(mask.err_at_k(k), err_at_k(&ranked, &relevant, k));
+            assert_eq!(mask.rbp_at_k(k, 0.8), rbp_at_k(&ranked, &relevant, k, 0.8));
+            assert_eq!(mask.f_measure_at_k(k, 2.0), f_measure_at_k(&ranked, &relevant, k, 2.0));
+            assert_eq!(mask.success_at_k(k), success_at_k(&ranked, &relevant, k));
+        }
+        assert_eq!(mask.mrr(), mrr(&ranked, &relevant));
+        assert_eq!(mask.average_precision(), average_precision(&ranked, &relevant));
+        assert_eq!(mask.r_precision(), r_precision(&ranked, &relevant));
+
+        let empty: HashSet<&str> = HashSet::new();
+        let mask = RelevanceMask::new(&ranked, &empty);
+        assert_eq!(mask.mrr(), 0.0);
+        assert_eq!(mask.ndcg_at_cutoffs([10]), [0.0]);
+        assert_eq!(mask.average_precision(), 0.0);
+    }
+
+    #[test]
+    fn test_dcg_at_cutoffs_matches_single_cutoff() {
+        let ranked = vec!["a", "x", "b", "c", "y", "z", "d"];
+        let relevant: HashSet<_> = ["a", "b", "c", "d"].into_iter().collect();
+        let dcg = |k| dcg_at_k(&ranked, &relevant, k);
+
+        let [d0, d3, d5, d20] = hits::dcg_at_cutoffs(hits_of(&ranked, &relevant), [0, 3, 5, 20]);
+        assert_eq!([d0, d3, d5, d20], [dcg(0), dcg(3), dcg(5), dcg(20)]);
+        assert_eq!(d0, 0.0);
+        assert_eq!(d20, dcg(ranked.len()));
+
+        let [i5, i10] = hits::dcg_at_cutoffs(std::iter::repeat(true).take(7), [5, 10]);
+        assert_eq!([i5, i10], [idcg_at_k(7, 5), idcg_at_k(7, 10)]);
+    }
+
+    #[test]
+    fn test_discount_table() {
+        for i in [0, 1, 2, 9, DISCOUNT_TABLE_LEN - 1, DISCOUNT_TABLE_LEN, 5000] {
+            assert_eq!(discount(i), 1.0 / (i as f64 + 2.0).log2());
+        }
+        assert_eq!(discount(0), 1.0);
+    }
+}
@@ -5,6 +5,7 @@
 use crate::trec::{Qrel, TrecRun};
 use serde::{Deserialize, Serialize};
 use std::collections::{HashMap, HashSet};
+use std::io::Write;
 
 /// Comprehensive dataset statistics.
 #[derive(Debug, Clone, Serialize, Deserialize)]
@@ -138,42 +139,45 @@ fn compute_run_statistics(runs: &[TrecRun]) -> RunStatistics {
         };
     }
 
-    let unique_queries: HashSet<String> = runs.iter().map(|r| r.query_id.clone()).collect();
-    let unique_documents: HashSet<String> = runs.iter().map(|r| r.doc_id.clone()).collect();
-    let unique_run_tags: HashSet<String> = runs.iter().map(|r| r.run_tag.clone()).collect();
-    
-    let mut queries_per_run: HashMap<String, usize> = HashMap::new();
-    let mut documents_per_run: HashMap<String, usize> = HashMap::new();
-    let mut docs_per_query: HashMap<String, usize> = HashMap::new();
-    let mut scores: Vec<f32> = runs.iter().map(|r| r.score).collect();
+    // Single pass over the runs, borrowing ids instead of cloning them into
+    // one set per statistic.
+    let mut unique_queries: HashSet<&str> = HashSet::new();
+    let mut unique_documents: HashSet<&str> = HashSet::new();
+    let mut entries_per_run: HashMap<&str, usize> = HashMap::new();
+    let mut unique_docs_per_run: HashMap<&str, HashSet<&str>> = HashMap::new();
+    let mut docs_per_query: HashMap<&str, usize> = HashMap::new();
+    let mut scores: Vec<f32> = Vec::with_capacity(runs.len());
 
     for run in runs {
-        *queries_per_run.entry(run.run_tag.clone()).or_insert(0) += 1;
-        *documents_per_run.entry(run.run_tag.clone()).or_insert(0) += 1;
-        *docs_per_query.entry(run.query_id.clone()).or_insert(0) += 1;
-    }
-
-    // Remove duplicates for document counting per run
-    let mut unique_docs_per_run: HashMap<String, HashSet<String>> = HashMap::new();
-    for run in runs {
+        unique_queries.insert(&run.query_id);
+        unique_documents.insert(&run.doc_id);
+        *entries_per_run.entry(&run.run_tag).or_insert(0) += 1;
         unique_docs_per_run
-            .entry(run.run_tag.clone())
+            .entry(&run.run_tag)
             .or_default()
-            .insert(run.doc_id.clone());
-    }
-    for (tag, docs) in &unique_docs_per_run {
-        documents_per_run.insert(tag.clone(), docs.len());
+            .insert(&run.doc_id);
+        *docs_per_query.entry(&run.query_id).or_insert(0) += 1;
+        scores.push(run.score);
     }
 
-    let docs_per_query_values: Vec<usize> = docs_per_query.values().copied().collect();
-    let avg_docs_per_query = if !docs_per_query_values.is_empty() {
-        docs_per_query_values.iter().sum::<usize>() as f64 / docs_per_query_values.len() as f64
+    let run_tags: Vec<String> = entries_per_run.keys().map(|tag| tag.to_string()).collect();
+    let queries_per_run: HashMap<String, usize> = entries_per_run
+        .iter()
+        .map(|(tag, &count)| (tag.to_string(), count))
+        .collect();
+    let documents_per_run: HashMap<String, usize> = unique_docs_per_run
+        .iter()
+        .map(|(tag, docs)| (tag.to_string(), docs.len()))
+        .collect();
+
+    let avg_docs_per_query = if !docs_per_query.is_empty() {
+        runs.len() as f64 / docs_per_query.len() as f64
     } else {
         0.0
     };
 
-    let max_docs_per_query = docs_per_query_values.iter().max().copied().unwrap_or(0);
-    let min_docs_per_query = docs_per_query_values.iter().min().copied().unwrap_or(0);
+    let max_docs_per_query = docs_per_query.values().max().copied().unwrap_or(0);
+    let min_docs_per_query = docs_per_query.values().min().copied().unwrap_or(0);
 
     // Compute score distribution
     scores.sort_by(|a, b| a.partial_cmp(b).unwrap_or(std::cmp::Ordering::Equal));
@@ -183,8 +187,8 @@ fn compute_run_statistics(runs: &[TrecRun]) -> RunStatistics {
         total_entries: runs.len(),
         unique_queries: unique_queries.len(),
         unique_documents: unique_documents.len(),
-        unique_run_tags: unique_run_tags.len(),
-        run_tags: unique_run_tags.iter().cloned().collect::<Vec<_>>(),
+        unique_run_tags: run_tags.len(),
+        run_tags,
         queries_per_run,
         documents_per_run,
         avg_docs_per_query,
@@ -208,17 +212,20 @@ fn compute_qrel_statistics(qrels: &[Qrel]) -> QrelStatistics {
         };
     }
 
-    let unique_queries: HashSet<String> = qrels.iter().map(|q| q.query_id.clone()).collect();
-    let unique_documents: HashSet<String> = qrels.iter().map(|q| q.doc_id.clone()).collect();
-    
+    // Single pass over the qrels, borrowing ids instead of cloning them into
+    // one set per statistic.
+    let mut unique_queries: HashSet<&str> = HashSet::new();
+    let mut unique_documents: HashSet<&str> = HashSet::new();
     let mut relevance_dist: HashMap<u32, usize> = HashMap::new();
-    let mut queries_with_relevant: HashSet<String> = HashSet::new();
+    let mut queries_with_relevant: HashSet<&str> = HashSet::new();
     let mut total_relevant = 0;
 
     for qrel in qrels {
+        unique_queries.insert(&qrel.query_id);
+        unique_documents.insert(&qrel.doc_id);
         *relevance_dist.entry(qrel.relevance).or_insert(0) += 1;
         if qrel.relevance > 0 {
-            queries_with_relevant.insert(qrel.query_id.clone());
+            queries_with_relevant.insert(&qrel.query_id);
             total_relevant += 1;
         }
     }
@@ -242,39 +249,33 @@ fn compute_qrel_statistics(qrels: &[Qrel]) -> QrelStatistics {
 
 /// Compute overlap statistics.
 fn compute_overlap_statistics(runs: &[TrecRun], qrels: &[Qrel]) -> OverlapStatistics {
-    let runs_queries: HashSet<String> = runs.iter().map(|r| r.query_id.clone()).collect();
-    let qrels_queries: HashSet<String> = qrels.iter().map(|q| q.query_id.clone()).collect();
-    
-    let queries_in_both: HashSet<_> = runs_queries.intersection(&qrels_queries).cloned().collect();
-    let queries_only_in_runs: HashSet<_> = runs_queries.difference(&qrels_queries).cloned().collect();
-    let queries_only_in_qrels: HashSet<_> = qrels_queries.difference(&runs_queries).cloned().collect();
+    let runs_queries: HashSet<&str> = runs.iter().map(|r| r.query_id.as_str()).collect();
+    let qrels_queries: HashSet<&str> = qrels.iter().map(|q| q.query_id.as_str()).collect();
+    let queries_in_both = runs_queries.intersection(&qrels_queries).count();
 
-    let runs_docs: HashSet<String> = runs.iter().map(|r| r.doc_id.clone()).collect();
-    let qrels_docs: HashSet<String> = qrels.iter().map(|q| q.doc_id.clone()).collect();
-    
-    let documents_in_both: HashSet<_> = runs_docs.intersection(&qrels_docs).cloned().collect();
-    let documents_only_in_runs: HashSet<_> = runs_docs.difference(&qrels_docs).cloned().collect();
-    let documents_only_in_qrels: HashSet<_> = qrels_docs.difference(&runs_docs).cloned().collect();
+    let runs_docs: HashSet<&str> = runs.iter().map(|r| r.doc_id.as_str()).collect();
+    let qrels_docs: HashSet<&str> = qrels.iter().map(|q| q.doc_id.as_str()).collect();
+    let documents_in_both = runs_docs.intersection(&qrels_docs).count();
 
     let query_overlap_ratio = if !runs_queries.is_empty() {
-        queries_in_both.len() as f64 / runs_queries.len() as f64
+        queries_in_both as f64 / runs_queries.len() as f64
     } else {
         0.0
     };
 
     let document_overlap_ratio = if !runs_docs.is_empty() {
-        documents_in_both.len() as f64 / runs_docs.len() as f64
+        documents_in_both as f64 / runs_docs.len() as f64
     } else {
         0.0
     };
 
     OverlapStatistics {
-        queries_in_both: queries_in_both.len(),
-        queries_only_in_runs: queries_only_in_runs.len(),
-        queries_only_in_qrels: queries_only_in_qrels.len(),
-        documents_in_both: documents_in_both.len(),
-        documents_only_in_runs: documents_only_in_runs.len(),
-        documents_only_in_qrels: documents_only_in_qrels.len(),
+        queries_in_both,
+        queries_only_in_runs: runs_queries.len() - queries_in_both,
+        queries_only_in_qrels: qrels_queries.len() - queries_in_both,
+        documents_in_both,
+        documents_only_in_runs: runs_docs.len() - documents_in_both,
+        documents_only_in_qrels: qrels_docs.len() - documents_in_both,
         query_overlap_ratio,
         document_overlap_ratio,
     }
@@ -389,61 +390,74 @@ fn compute_score_distribution(scores: &[f32]) -> ScoreDistribution {
     }
 }
 
+/// Write comprehensive statistics report to `out`.
+pub fn write_statistics_report<W: Write>(
+    stats: &ComprehensiveStats,
+    out: &mut W,
+) -> std::io::Result<()> {
+    writeln!(out, "\n╔════════════════════════════════════════════════════════════════╗")?;
+    writeln!(out, "║              Dataset Statistics Report                         ║")?;
+    writeln!(out, "╚════════════════════════════════════════════════════════════════╝\n")?;
+
+    writeln!(out, "┌─ Run File Statistics ──────────────────────────────────────────┐")?;
+    writeln!(out, "│ Total entries:        {:>10}                                │", stats.runs.total_entries)?;
+    writeln!(out, "│ Unique queries:       {:>10}                                │", stats.runs.unique_queries)?;
+    writeln!(out, "│ Unique documents:     {:>10}                                │", stats.runs.unique_documents)?;
+    writeln!(out, "│ Unique run tags:      {:>10}                                │", stats.runs.unique_run_tags)?;
+    writeln!(out, "│ Run tags:             {:>10}                                │", stats.runs.run_tags.join(", "))?;
+    writeln!(out, "│ Avg docs per query:   {:>10.2}                                │", stats.runs.avg_docs_per_query)?;
+    writeln!(out, "│ Min docs per query:   {:>10}                                │", stats.runs.min_docs_per_query)?;
+    writeln!(out, "│ Max docs per query:   {:>10}                                │", stats.runs.max_docs_per_query)?;
+    writeln!(out, "└────────────────────────────────────────────────────────────────┘\n")?;
+
+    writeln!(out, "┌─ Score Distribution ───────────────────────────────────────────┐")?;
+    writeln!(out, "│ Min:        {:>10.6}  │  Max:        {:>10.6}              │", 
+        stats.runs.score_distribution.min, stats.runs.score_distribution.max)?;
+    writeln!(out, "│ Mean:       {:>10.6}  │  Median:     {:>10.6}              │", 
+        stats.runs.score_distribution.mean, stats.runs.score_distribution.median)?;
+    writeln!(out, "│ Std Dev:    {:>10.6}  │  P25:        {:>10.6}              │", 
+        stats.runs.score_distribution.std_dev, stats.runs.score_distribution.percentiles.p25)?;
+    writeln!(out, "│ P50:        {:>10.6}  │  P75:        {:>10.6}              │", 
+        stats.runs.score_distribution.percentiles.p50, stats.runs.score_distribution.percentiles.p75)?;
+    writeln!(out, "│ P90:        {:>10.6}  │  P95:        {:>10.6}              │", 
+        stats.runs.score_distribution.percentiles.p90, stats.runs.score_distribution.percentiles.p95)?;
+    writeln!(out, "└────────────────────────────────────────────────────────────────┘\n")?;
+
+    writeln!(out, "┌─ Qrel Statistics ─────────────────────────────────────────────┐")?;
+    writeln!(out, "│ Total entries:        {:>10}                                │", stats.qrels.total_entries)?;
+    writeln!(out, "│ Unique queries:       {:>10}                                │", stats.qrels.unique_queries)?;
+    writeln!(out, "│ Unique documents:      {:>10}                                │", stats.qrels.unique_documents)?;
+    writeln!(out, "│ Queries with relevant: {:>10}                                │", stats.qrels.queries_with_relevant)?;
+    writeln!(out, "│ Total relevant docs:   {:>10}                                │", stats.qrels.total_relevant)?;
+    writeln!(out, "│ Avg relevance/query:   {:>10.2}                                │", stats.qrels.avg_relevance_per_query)?;
+    writeln!(out, "└────────────────────────────────────────────────────────────────┘\n")?;
+
+    writeln!(out, "┌─ Overlap Statistics ───────────────────────────────────────────┐")?;
+    writeln!(out, "│ Queries in both:      {:>10}  ({:.1}% overlap)            │", 
+        stats.overlap.queries_in_both, stats.overlap.query_overlap_ratio * 100.0)?;
+    writeln!(out, "│ Queries only in runs: {:>10}                                │", stats.overlap.queries_only_in_runs)?;
+    writeln!(out, "│ Queries only in qrels: {:>10}                                │", stats.overlap.queries_only_in_qrels)?;
+    writeln!(out, "│ Documents in both:    {:>10}  ({:.1}% overlap)            │", 
+        stats.overlap.documents_in_both, stats.overlap.document_overlap_ratio * 100.0)?;
+    writeln!(out, "└────────────────────────────────────────────────────────────────┘\n")?;
+
+    writeln!(out, "┌─ Quality Metrics ─────────────────────────────────────────────┐")?;
+    writeln!(out, "│ Queries with 2+ runs: {:>10}  ({:.1}% ready)              │", 
+        stats.quality.queries_with_multiple_runs, stats.quality.fusion_readiness_ratio * 100.0)?;
+    writeln!(out, "│ Queries with 1 run:   {:>10}                                │", stats.quality.queries_with_single_run)?;
+    writeln!(out, "│ Avg runs per query:   {:>10.2}                                │", stats.quality.avg_runs_per_query)?;
+    writeln!(out, "│ Fusion readiness:     {:>10.1}%                                │", stats.quality.fusion_readiness_ratio * 100.0)?;
+    writeln!(out, "└────────────────────────────────────────────────────────────────┘\n")?;
+
+    Ok(())
+}
+
 /// Print comprehensive statistics report.
 pub fn print_statistics_report(stats: &ComprehensiveStats) {
-    println!("\n╔════════════════════════════════════════════════════════════════╗");
-    println!("║              Dataset Statistics Report                         ║");
-    println!("╚════════════════════════════════════════════════════════════════╝\n");
-
-    println!("┌─ Run File Statistics ──────────────────────────────────────────┐");
-    println!("│ Total entries:        {:>10}                                │", stats.runs.total_entries);
-    println!("│ Unique queries:       {:>10}                                │", stats.runs.unique_queries);
-    println!("│ Unique documents:     {:>10}                                │", stats.runs.unique_documents);
-    println!("│ Unique run tags:      {:>10}                                │", stats.runs.unique_run_tags);
-    println!("│ Run tags:             {:>10}                                │", stats.runs.run_tags.join(", "));
-    println!("│ Avg docs per query:   {:>10.2}                                │", stats.runs.avg_docs_per_query);
-    println!("│ Min docs per query:   {:>10}                                │", stats.runs.min_docs_per_query);
-    println!("│ Max docs per query:   {:>10}                                │", stats.runs.max_docs_per_query);
-    println!("└────────────────────────────────────────────────────────────────┘\n");
-
-    println!("┌─ Score Distribution ───────────────────────────────────────────┐");
-    println!("│ Min:        {:>10.6}  │  Max:        {:>10.6}              │", 
-        stats.runs.score_distribution.min, stats.runs.score_distribution.max);
-    println!("│ Mean:       {:>10.6}  │  Median:     {:>10.6}              │", 
-        stats.runs.score_distribution.mean, stats.runs.score_distribution.median);
-    println!("│ Std Dev:    {:>10.6}  │  P25:        {:>10.6}              │", 
-        stats.runs.score_distribution.std_dev, stats.runs.score_distribution.percentiles.p25);
-    println!("│ P50:        {:>10.6}  │  P75:        {:>10.6}              │", 
-        stats.runs.score_distribution.percentiles.p50, stats.runs.score_distribution.percentiles.p75);
-    println!("│ P90:        {:>10.6}  │  P95:        {:>10.6}              │", 
-        stats.runs.score_distribution.percentiles.p90, stats.runs.score_distribution.percentiles.p95);
-    println!("└────────────────────────────────────────────────────────────────┘\n");
-
-    println!("┌─ Qrel Statistics ─────────────────────────────────────────────┐");
-    println!("│ Total entries:        {:>10}                                │", stats.qrels.total_entries);
-    println!("│ Unique queries:       {:>10}                                │", stats.qrels.unique_queries);
-    println!("│ Unique documents:      {:>10}                                │", stats.qrels.unique_documents);
-    println!("│ Queries with relevant: {:>10}                                │", stats.qrels.queries_with_relevant);
-    println!("│ Total relevant docs:   {:>10}                                │", stats.qrels.total_relevant);
-    println!("│ Avg relevance/query:   {:>10.2}                                │", stats.qrels.avg_relevance_per_query);
-    println!("└────────────────────────────────────────────────────────────────┘\n");
-
-    println!("┌─ Overlap Statistics ───────────────────────────────────────────┐");
-    println!("│ Queries in both:      {:>10}  ({:.1}% overlap)            │", 
-        stats.overlap.queries_in_both, stats.overlap.query_overlap_ratio * 100.0);
-    println!("│ Queries only in runs: {:>10}                                │", stats.overlap.queries_only_in_runs);
-    println!("│ Queries only in qrels: {:>10}                                │", stats.overlap.queries_only_in_qrels);
-    println!("│ Documents in both:    {:>10}  ({:.1}% overlap)            │", 
-        stats.overlap.documents_in_both, stats.overlap.document_overlap_ratio * 100.0);
-    println!("└────────────────────────────────────────────────────────────────┘\n");
-
-    println!("┌─ Quality Metrics ─────────────────────────────────────────────┐");
-    println!("│ Queries with 2+ runs: {:>10}  ({:.1}% ready)              │", 
-        stats.quality.queries_with_multiple_runs, stats.quality.fusion_readiness_ratio * 100.0);
-    println!("│ Queries with 1 run:   {:>10}                                │", stats.quality.queries_with_single_run);
-    println!("│ Avg runs per query:   {:>10.2}                                │", stats.quality.avg_runs_per_query);
-    println!("│ Fusion readiness:     {:>10.1}%                                │", stats.quality.fusion_readiness_ratio * 100.0);
-    println!("└────────────────────────────────────────────────────────────────┘\n");
+    // Render the whole report through one locked handle instead of
+    // re-acquiring the stdout lock for every line.
+    let mut out = std::io::stdout().lock();
+    write_statistics_report(stats, &mut out).expect("failed to write report to stdout");
 }
 
 
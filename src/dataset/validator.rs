@@ -7,6 +7,7 @@ use crate::trec::{load_qrels, load_trec_runs, TrecRun};
 use anyhow::Result;
 use serde::{Deserialize, Serialize};
 use std::collections::{HashMap, HashSet};
+use std::io::Write;
 use std::path::Path;
 
 /// Comprehensive validation result.
@@ -204,57 +205,68 @@ pub fn validate_dataset(
     })
 }
 
-/// Print validation report to stdout.
-pub fn print_validation_report(result: &DatasetValidationResult) {
-    println!("\n╔════════════════════════════════════════════════════════════════╗");
-    println!("║              Dataset Validation Report                         ║");
-    println!("╚════════════════════════════════════════════════════════════════╝\n");
+/// Write validation report to `out`.
+pub fn write_validation_report<W: Write>(
+    result: &DatasetValidationResult,
+    out: &mut W,
+) -> std::io::Result<()> {
+    writeln!(out, "\n╔════════════════════════════════════════════════════════════════╗")?;
+    writeln!(out, "║              Dataset Validation Report                         ║")?;
+    writeln!(out, "╚════════════════════════════════════════════════════════════════╝\n")?;
 
     let status = if result.is_valid { "✓ VALID" } else { "✗ INVALID" };
-    println!("Status: {}\n", status);
+    writeln!(out, "Status: {}\n", status)?;
 
-    println!("Validation Checks:");
-    println!("  Runs:        {}", if result.runs_valid { "✓" } else { "✗" });
-    println!("  Qrels:       {}", if result.qrels_valid { "✓" } else { "✗" });
-    println!("  Consistency: {}", if result.consistency_valid { "✓" } else { "✗" });
+    writeln!(out, "Validation Checks:")?;
+    writeln!(out, "  Runs:        {}", if result.runs_valid { "✓" } else { "✗" })?;
+    writeln!(out, "  Qrels:       {}", if result.qrels_valid { "✓" } else { "✗" })?;
+    writeln!(out, "  Consistency: {}", if result.consistency_valid { "✓" } else { "✗" })?;
 
     if !result.errors.is_empty() {
-        println!("\nErrors:");
+        writeln!(out, "\nErrors:")?;
         for error in &result.errors {
-            println!("  ✗ {}", error);
+            writeln!(out, "  ✗ {}", error)?;
         }
     }
 
     if !result.warnings.is_empty() {
-        println!("\nWarnings:");
+        writeln!(out, "\nWarnings:")?;
         for warning in &result.warnings {
-            println!("  ⚠ {}", warning);
+            writeln!(out, "  ⚠ {}", warning)?;
         }
     }
 
-    println!("\nStatistics:");
-    println!("  Runs:        {} entries", result.statistics.runs_count);
-    println!("  Qrels:       {} entries", result.statistics.qrels_count);
-    println!("  Queries:     {} in runs, {} in qrels, {} in both",
+    writeln!(out, "\nStatistics:")?;
+    writeln!(out, "  Runs:        {} entries", result.statistics.runs_count)?;
+    writeln!(out, "  Qrels:       {} entries", result.statistics.qrels_count)?;
+    writeln!(out, "  Queries:     {} in runs, {} in qrels, {} in both",
         result.statistics.unique_queries_in_runs,
         result.statistics.unique_queries_in_qrels,
         result.statistics.queries_in_both
-    );
-    println!("  Documents:   {} in runs, {} in qrels, {} in both",
+    )?;
+    writeln!(out, "  Documents:   {} in runs, {} in qrels, {} in both",
         result.statistics.unique_documents_in_runs,
         result.statistics.unique_documents_in_qrels,
         result.statistics.documents_in_both
-    );
+    )?;
 
     if result.statistics.queries_only_in_runs > 0 {
-        println!("\n  Note: {} queries in runs but not in qrels (will be skipped)",
-            result.statistics.queries_only_in_runs);
+        writeln!(out, "\n  Note: {} queries in runs but not in qrels (will be skipped)",
+            result.statistics.queries_only_in_runs)?;
     }
 
     if result.statistics.queries_only_in_qrels > 0 {
-        println!("\n  Note: {} queries in qrels but not in runs (cannot evaluate)",
-            result.statistics.queries_only_in_qrels);
+        writeln!(out, "\n  Note: {} queries in qrels but not in runs (cannot evaluate)",
+            result.statistics.queries_only_in_qrels)?;
     }
+
+    Ok(())
+}
+
+/// Print validation report to stdout.
+pub fn print_validation_report(result: &DatasetValidationResult) {
+    let mut out = std::io::stdout().lock();
+    write_validation_report(result, &mut out).expect("failed to write report to stdout");
 }
 
 
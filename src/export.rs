@@ -87,16 +87,18 @@ pub fn export_to_csv<W: Write>(results: &BatchResults, writer: &mut W) -> std::i
 /// ```
 #[cfg(feature = "serde")]
 pub fn export_to_json(results: &BatchResults) -> Result<String, serde_json::Error> {
+    // Borrowing views over the results, so serialization reads the existing
+    // maps directly instead of cloning every query's metrics first.
     #[derive(serde::Serialize)]
-    struct ExportableResults {
-        query_results: Vec<QueryResultsExport>,
-        aggregated: HashMap<String, f64>,
+    struct ExportableResults<'a> {
+        query_results: Vec<QueryResultsExport<'a>>,
+        aggregated: &'a HashMap<String, f64>,
     }
 
     #[derive(serde::Serialize)]
-    struct QueryResultsExport {
-        query_id: String,
-        metrics: HashMap<String, f64>,
+    struct QueryResultsExport<'a> {
+        query_id: &'a str,
+        metrics: &'a HashMap<String, f64>,
     }
 
     let exportable = ExportableResults {
@@ -104,11 +106,11 @@ pub fn export_to_json(results: &BatchResults) -> Result<String, serde_json::Erro
             .query_results
             .iter()
             .map(|qr| QueryResultsExport {
-                query_id: qr.query_id.clone(),
-                metrics: qr.metrics.clone(),
+                query_id: &qr.query_id,
+                metrics: &qr.metrics,
             })
             .collect(),
-        aggregated: results.aggregated.clone(),
+        aggregated: &results.aggregated,
     };
 
     serde_json::to_string_pretty(&exportable)
@@ -153,6 +155,10 @@ mod tests {
         assert!(json.contains("query_results"));
         assert!(json.contains("aggregated"));
         assert!(json.contains("ndcg@10"));
+
+        let parsed: serde_json::Value = serde_json::from_str(&json).unwrap();
+        assert_eq!(parsed["query_results"][0]["query_id"], "query_0");
+        assert_eq!(parsed["aggregated"]["ndcg@10"], 1.0);
     }
 }
 
@@ -6,6 +6,7 @@
 //! Unlike binary metrics, these use the actual relevance scores in calculations,
 //! making them more suitable for real-world datasets with graded judgments.
 
+use crate::binary::discount;
 use std::collections::HashMap;
 
 /// Compute nDCG@k for graded relevance.
@@ -54,23 +55,31 @@ pub fn compute_ndcg(
     qrels: &HashMap<String, u32>,
     k: usize,
 ) -> f64 {
-    let mut dcg = 0.0;
+    let dcg: f64 = ranked
+        .iter()
+        .take(k)
+        .enumerate()
+        .filter_map(|(rank, (doc_id, _))| match qrels.get(doc_id.as_str()) {
+            Some(&relevance) if relevance > 0 => Some(relevance as f64 * discount(rank)),
+            _ => None,
+        })
+        .sum();
+
+    // Only the k largest grades contribute to IDCG, so partition them to the
+    // front and sort just those instead of every judged document.
     let mut ideal_gains: Vec<u32> = qrels.values().copied().filter(|&r| r > 0).collect();
-    ideal_gains.sort_by(|a, b| b.cmp(a));
-
-    for (rank, (doc_id, _)) in ranked.iter().take(k).enumerate() {
-        if let Some(&relevance) = qrels.get(doc_id.as_str()) {
-            if relevance > 0 {
-                // Use log2(rank + 2) for DCG calculation
-                dcg += (relevance as f64) / ((rank + 2) as f64).log2();
-            }
-        }
+    if k < ideal_gains.len() {
+        ideal_gains.select_nth_unstable_by(k, |a, b| b.cmp(a));
+        ideal_gains.truncate(k);
     }
+    ideal_gains.sort_unstable_by(|a, b| b.cmp(a));
 
-    let mut idcg = 0.0;
-    for (rank, &gain) in ideal_gains.iter().take(k).enumerate() {
-        idcg += (gain as f64) / ((rank + 2) as f64).log2();
-    }
+    let idcg: f64 = ideal_gains
+        .iter()
+        .take(k)
+        .enumerate()
+        .map(|(rank, &gain)| gain as f64 * discount(rank))
+        .sum();
 
     if idcg > 0.0 {
         dcg / idcg
@@ -124,13 +133,9 @@ pub fn compute_ndcg(
 /// assert!(map >= 0.0 && map <= 1.0);
 /// ```
 pub fn compute_map(ranked: &[(String, f32)], qrels: &HashMap<String, u32>) -> f64 {
-    let relevant_docs: Vec<&String> = qrels
-        .iter()
-        .filter(|(_, &rel)| rel > 0)
-        .map(|(doc_id, _)| doc_id)
-        .collect();
+    let n_relevant = qrels.values().filter(|&&rel| rel > 0).count();
 
-    if relevant_docs.is_empty() {
+    if n_relevant == 0 {
         return 0.0;
     }
 
@@ -145,7 +150,7 @@ pub fn compute_map(ranked: &[(String, f32)], qrels: &HashMap<String, u32>) -> f6
     }
 
     if relevant_found > 0 {
-        sum_precision / relevant_docs.len() as f64
+        sum_precision / n_relevant as f64
     } else {
         0.0
     }
@@ -220,5 +225,39 @@ mod tests {
         let map = compute_map(&ranked, &qrels);
         assert_eq!(map, 0.0);
     }
-}
 
+    #[test]
+    fn test_compute_ndcg_ideal_uses_top_k_grades() {
+        let ranked = vec![
+            ("doc1".to_string(), 0.9),
+            ("doc2".to_string(), 0.8),
+            ("doc3".to_string(), 0.7),
+        ];
+        let grades = [1, 3, 0, 2, 4, 1, 2];
+        let qrels: HashMap<String, u32> = grades
+            .iter()
+            .enumerate()
+            .map(|(i, &g)| (format!("doc{}", i + 1), g))
+            .collect();
+
+        let mut sorted: Vec<u32> = grades.iter().copied().filter(|&g| g > 0).collect();
+        sorted.sort_by(|a, b| b.cmp(a));
+
+        for k in 0..=grades.len() + 1 {
+            let dcg: f64 = ranked
+                .iter()
+                .take(k)
+                .enumerate()
+                .map(|(i, (id, _))| qrels[id] as f64 / ((i + 2) as f64).log2())
+                .sum();
+            let idcg: f64 = sorted
+                .iter()
+                .take(k)
+                .enumerate()
+                .map(|(i, &g)| g as f64 / ((i + 2) as f64).log2())
+                .sum();
+            let expected = if idcg > 0.0 { dcg / idcg } else { 0.0 };
+            assert!((compute_ndcg(&ranked, &qrels, k) - expected).abs() < 1e-12);
+        }
+    }
+}
@@ -54,23 +54,13 @@ pub fn paired_t_test(method_a: &[f64], method_b: &[f64], alpha: f64) -> TTestRes
         };
     }
 
-    // Compute differences
-    let differences: Vec<f64> = method_a
-        .iter()
-        .zip(method_b.iter())
-        .map(|(a, b)| a - b)
-        .collect();
+    // Paired differences, evaluated lazily rather than collected
+    let n = method_a.len();
+    let differences = method_a.iter().zip(method_b.iter()).map(|(a, b)| a - b);
 
-    // Mean difference
-    let mean_diff = differences.iter().sum::<f64>() / differences.len() as f64;
-
-    // Standard error
-    let variance = differences
-        .iter()
-        .map(|d| (d - mean_diff).powi(2))
-        .sum::<f64>()
-        / (differences.len() - 1) as f64;
-    let std_error = (variance / differences.len() as f64).sqrt();
+    // Mean difference and standard error
+    let (mean_diff, variance) = mean_and_variance(differences);
+    let std_error = (variance / n as f64).sqrt();
 
     // t-statistic
     let t_statistic = if std_error > 1e-10 {
@@ -80,7 +70,7 @@ pub fn paired_t_test(method_a: &[f64], method_b: &[f64], alpha: f64) -> TTestRes
     };
 
     // Degrees of freedom
-    let df = differences.len() - 1;
+    let df = n - 1;
 
     // Approximate p-value using t-distribution
     // For simplicity, using a normal approximation for large samples
@@ -131,12 +121,7 @@ pub fn confidence_interval(scores: &[f64], confidence: f64) -> (f64, f64) {
         return (0.0, 0.0);
     }
 
-    let mean = scores.iter().sum::<f64>() / scores.len() as f64;
-    let variance = scores
-        .iter()
-        .map(|s| (s - mean).powi(2))
-        .sum::<f64>()
-        / (scores.len() - 1) as f64;
+    let (mean, variance) = mean_and_variance(scores.iter().copied());
     let std_dev = variance.sqrt();
 
     // Standard error
@@ -183,13 +168,10 @@ pub fn cohens_d(method_a: &[f64], method_b: &[f64]) -> f64 {
         return 0.0;
     }
 
-    let mean_a = method_a.iter().sum::<f64>() / method_a.len() as f64;
-    let mean_b = method_b.iter().sum::<f64>() / method_b.len() as f64;
+    let (mean_a, var_a) = mean_and_variance(method_a.iter().copied());
+    let (mean_b, var_b) = mean_and_variance(method_b.iter().copied());
 
     // Pooled standard deviation
-    let var_a: f64 = method_a.iter().map(|x| (x - mean_a).powi(2)).sum::<f64>() / (method_a.len() - 1) as f64;
-    let var_b: f64 = method_b.iter().map(|x| (x - mean_b).powi(2)).sum::<f64>() / (method_b.len() - 1) as f64;
-    
     let pooled_std = ((var_a + var_b) / 2.0).sqrt();
 
     if pooled_std < 1e-10 {
@@ -199,6 +181,21 @@ pub fn cohens_d(method_a: &[f64], method_b: &[f64]) -> f64 {
     (mean_a - mean_b) / pooled_std
 }
 
+/// Mean and sample variance (n - 1 denominator) of the values.
+///
+/// Takes a cloneable iterator so callers can pass derived values (e.g. paired
+/// differences) without collecting them into a temporary vector. The values
+/// are counted during the first pass.
+fn mean_and_variance<It>(values: It) -> (f64, f64)
+where
+    It: Iterator<Item = f64> + Clone,
+{
+    let (sum, n) = values.clone().fold((0.0, 0usize), |(sum, n), v| (sum + v, n + 1));
+    let mean = sum / n as f64;
+    let variance = values.map(|v| (v - mean).powi(2)).sum::<f64>() / (n - 1) as f64;
+    (mean, variance)
+}
+
 /// Normal CDF approximation (using error function).
 fn normal_cdf(x: f64) -> f64 {
     0.5 * (1.0 + erf(x / (2.0_f64).sqrt()))
@@ -43,12 +43,17 @@ pub struct Qrel {
 pub fn load_trec_runs(path: impl AsRef<Path>) -> Result<Vec<TrecRun>> {
     let file = File::open(path.as_ref())
         .with_context(|| format!("Failed to open TREC runs file: {:?}", path.as_ref()))?;
-    let reader = BufReader::new(file);
+    let mut reader = BufReader::new(file);
     let mut runs = Vec::new();
+    // One line buffer reused for the whole file instead of a String per line.
+    let mut buf = String::new();
 
-    for (line_num, line) in reader.lines().enumerate() {
-        let line = line.context("Failed to read line")?;
-        let line = line.trim();
+    for line_num in 0usize.. {
+        buf.clear();
+        if reader.read_line(&mut buf).context("Failed to read line")? == 0 {
+            break;
+        }
+        let line = buf.trim();
         if line.is_empty() || line.starts_with('#') {
             continue;
         }
@@ -129,12 +134,16 @@ pub fn load_trec_runs(path: impl AsRef<Path>) -> Result<Vec<TrecRun>> {
 pub fn load_qrels(path: impl AsRef<Path>) -> Result<Vec<Qrel>> {
     let file = File::open(path.as_ref())
         .with_context(|| format!("Failed to open qrels file: {:?}", path.as_ref()))?;
-    let reader = BufReader::new(file);
+    let mut reader = BufReader::new(file);
     let mut qrels = Vec::new();
+    let mut buf = String::new();
 
-    for (line_num, line) in reader.lines().enumerate() {
-        let line = line.context("Failed to read line")?;
-        let line = line.trim();
+    for line_num in 0usize.. {
+        buf.clear();
+        if reader.read_line(&mut buf).context("Failed to read line")? == 0 {
+            break;
+        }
+        let line = buf.trim();
         if line.is_empty() || line.starts_with('#') {
             continue;
         }
@@ -3,7 +3,7 @@
 #[cfg(feature = "serde")]
 mod tests {
     use rank_eval::dataset::*;
-    use rank_eval::trec::{load_trec_runs, load_qrels};
+    use rank_eval::trec::{load_trec_runs, load_qrels, Qrel};
     use std::fs;
     use std::io::Write;
     use tempfile::TempDir;
@@ -84,6 +84,28 @@ mod tests {
         assert!(stats.quality.queries_with_multiple_runs > 0);
     }
 
+    #[test]
+    fn test_write_reports() {
+        let (_runs_dir, runs_path) = create_temp_trec_runs();
+        let (_qrels_dir, qrels_path) = create_temp_trec_qrels();
+
+        let runs = load_trec_runs(&runs_path).unwrap();
+        let qrels = load_qrels(&qrels_path).unwrap();
+
+        let mut report = Vec::new();
+        write_statistics_report(&compute_comprehensive_stats(&runs, &qrels), &mut report).unwrap();
+        let report = String::from_utf8(report).unwrap();
+        assert!(report.contains("Dataset Statistics Report"));
+        assert!(report.contains("Quality Metrics"));
+
+        let mut report = Vec::new();
+        let result = validate_dataset(&runs_path, &qrels_path).unwrap();
+        write_validation_report(&result, &mut report).unwrap();
+        let report = String::from_utf8(report).unwrap();
+        assert!(report.contains("Dataset Validation Report"));
+        assert!(report.contains("✓ VALID"));
+    }
+
     #[test]
     fn test_dataset_loaders() {
         let (_runs_dir, runs_path) = create_temp_trec_runs();
@@ -244,6 +266,25 @@ mod tests {
         assert!(stats.qrels.relevance_distribution.contains_key(&2));
     }
 
+    #[test]
+    fn test_relevance_distribution_large_grades() {
+        let qrel = |doc: &str, relevance: u32| Qrel {
+            query_id: "1".to_string(),
+            doc_id: doc.to_string(),
+            relevance,
+        };
+        let qrels = vec![qrel("a", 0), qrel("b", 3), qrel("c", 3), qrel("d", 100), qrel("e", 100)];
+
+        let stats = compute_comprehensive_stats(&[], &qrels);
+        let dist = &stats.qrels.relevance_distribution;
+
+        assert_eq!(dist.len(), 3);
+        assert_eq!(dist[&0], 1);
+        assert_eq!(dist[&3], 2);
+        assert_eq!(dist[&100], 2);
+        assert_eq!(stats.qrels.total_relevant, 4);
+    }
+
     #[test]
     fn test_fusion_readiness() {
         let (_runs_dir, runs_path) = create_temp_trec_runs();